@@ -1,9 +1,8 @@
 '''Helper functions for experiment management scripts.'''
 
-import os, sys, subprocess
+import os, sys, stat, subprocess, atexit, uuid, shlex
 import functools as ft
 from typing import Any, Callable, Optional, TypeAlias, Union
-from termcolor import cprint
 
 from typing import List
 from subprocess import CompletedProcess
@@ -15,28 +14,40 @@ FileDescriptorOrPath : TypeAlias = type[int] | type[str] | type[bytes] | type[Pa
 
 ########################################################################################################################
 
-def downwardlab_home(path:Optional[StrOrBytesPath]=os.getcwd()):
+def downwardlab_home(path:Optional[StrOrBytesPath]=None):
     '''Search CWD and direct ancestors for directory that has 'downward' and VAL subdirectories.
     
     Directory Name              Description                     Additional Check
     downward :                  Fast Downward algo repo         Contains 'fast-downward.py' file
     VAL :                       VAL plan validation repo        Contains 'validate' file
+
+    If the DOWNWARDLAB_HOME environment variable names a valid home directory, it is
+    returned without searching. Search results are cached per (absolute) start path.
     '''
-    def condition(path):
-        landmark_dirs = {
-            'downward' : os.path.join(path, 'downward'),
-            'val' : os.path.join(path, 'VAL')
-        }
-        landmark_files = {
-            'fastdownward' : os.path.join(landmark_dirs['downward'], 'fast-downward.py'),
-            'validate' : os.path.join(landmark_dirs['val'], 'validate')
-        }
-        return (    all(os.path.exists(d) for d in landmark_dirs.values()) and
-                    all(os.path.exists(f) and not os.path.isdir(f) for f in landmark_files.values())    )
-        
-    path = os.path.abspath(path)
-    if condition(path): return path
-    return path if condition(path) else get_nearest_ancestor(path,condition=condition)
+    if path is None: path = os.getcwd()
+    home = os.environ.get('DOWNWARDLAB_HOME')
+    if home and _is_downwardlab_home(home): 
+        return os.path.abspath(home)
+    return _find_downwardlab_home(os.path.abspath(path))
+
+@ft.lru_cache(maxsize=None)
+def _find_downwardlab_home(path:StrOrBytesPath) -> StrOrBytesPath:
+    if _is_downwardlab_home(path): return path
+    return get_nearest_ancestor(path, condition=_is_downwardlab_home)
+
+def _is_downwardlab_home(path:StrOrBytesPath) -> bool:
+    # one directory read yields both landmark dirs along with their dirent type bits
+    try:
+        with os.scandir(path) as it:
+            entries = {e.name: e for e in it if e.name in ('downward', 'VAL')}
+    except OSError:
+        return False
+    # cheapest checks first: dirent lookups cost no syscalls, the landmark files one stat each
+    downward, val = entries.get('downward'), entries.get('VAL')
+    if downward is None or not downward.is_dir(): return False
+    if val is None or not val.is_dir(): return False
+    if not os.path.isfile(os.path.join(downward.path, 'fast-downward.py')): return False
+    return os.path.isfile(os.path.join(val.path, 'validate'))
 
 
 
@@ -49,34 +60,31 @@ def get_nearest_ancestor(path:Optional[StrOrBytesPath]=None,
     if condition is None:
         condition = lambda d: True
 
-    def check_parent(path, condition):
-        parent = os.path.dirname(path)
+    current = path
+    while True:
+        parent = os.path.dirname(current)
         # recognize if we've encountered a top-level or nonexistent path
-        if (parent==path) or (not os.path.exists(parent)):
-            return None
+        if (parent==current) or (not os.path.exists(parent)):
+            raise FileNotFoundError(f"DownwardLab Home directory could not be found in direct ancestors of path '{path}'.")
         # if parent satisfies condition, it is the nearest ancestor
-        elif condition(parent):
+        if condition(parent):
             return parent
         # otherwise, go up another level
-        else:
-            return check_parent(parent, condition)
+        current = parent
+
 
-    ancestor = check_parent(path, condition)
-    if ancestor is None: 
-        raise FileNotFoundError(f"DownwardLab Home directory could not be found in direct ancestors of path '{path}'.")
-    return ancestor
+_EXEC_MASK = stat.S_IXUSR | stat.S_IXGRP | stat.S_IXOTH
 
+def _current_umask() -> int:
+    # the umask can only be read by setting it, so restore it straight away
+    umask = os.umask(0)
+    os.umask(umask)
+    return umask
 
 def chmod_plus_x(path:StrOrBytesPath):
     # Reference: https://stackoverflow.com/questions/12791997/how-do-you-do-a-simple-chmod-x-from-within-python/55591471#55591471
-    import os, stat
-    def get_umask():
-        umask = os.umask(0)
-        os.umask(umask)
-        return umask
     mode = os.stat(path).st_mode
-    exec_mask = (  stat.S_IXUSR | stat.S_IXGRP | stat.S_IXOTH )
-    os.chmod(path, mode | ( exec_mask & ~get_umask() ))
+    os.chmod(path, mode | ( _EXEC_MASK & ~_current_umask() ))
 
 
 def add_abort_condition(rval_condition:Predicate, error:Union[bool,type]=False, verbose:bool=False, errmsg:str='default'):
@@ -85,32 +93,40 @@ def add_abort_condition(rval_condition:Predicate, error:Union[bool,type]=False,
     TODO: add logging
     '''
     def decorator(f:Callable):
+        # resolve the message once; only the default message depends on the return value
+        if errmsg is True or errmsg=='default':
+            template = f"function '{f.__name__}' return value '{{rval}}' meets abort condition."
+        else:
+            template = (errmsg or '').replace('{', '{{').replace('}', '}}')
+
         @ft.wraps(f)
         def wrapper(*args, **kwargs):
             rval = f(*args, **kwargs)
             if rval_condition(rval):    abort(rval)
-            else:                       return rval     
+            return rval
         def abort(rval:Any):
-            msg = format_error_msg(errmsg, rval)
+            msg = template.format(rval=rval)
             if verbose:   
+                from termcolor import cprint # only needed on this rarely taken path
                 cprint(f"[ABORT] {msg}", "red")
             if error:
-                if issubclass(error):   raise error(msg)
-                else:                   raise Exception(msg, rval_condition, f, rval) 
+                if isinstance(error, type) and issubclass(error, BaseException):
+                    raise error(msg)
+                else:
+                    raise Exception(msg, rval_condition, f, rval) 
             else:
                 sys.exit(1)
-        def format_error_msg(msg, rval):
-            if msg is True or errmsg=='default': 
-                msg = f"function '{f.__name__}' return value '{rval}' meets abort condition."
-            elif not msg: 
-                msg = ''
-            return msg
         return wrapper
     return decorator
 
 
 
 
+# Defensive only: a non-interactive, non-login bash (`bash -c`, or one reading a pipe) never
+# reads the user's profile or rc files anyway. These options just keep it that way if the
+# shell is ever started interactively or as a login shell.
+_BASH_STARTUP_OPTS = ('--noprofile', '--norc')
+
 class VirtualenvwrapperCLI:
 
     _SOURCE_CMD = 'source "${VIRTUALENVWRAPPER_SCRIPT}"'
@@ -134,9 +150,13 @@ class VirtualenvwrapperCLI:
     
     #####################################################################
     
-    # wrapper for '_exec_with_virtualenvwrapper_api' for ease of use
+    # run in the shared bash session; fall back to a one-shot shell if it cannot be started
     def exec(*commands:List[str]) -> CompletedProcess[bytes]:
-        return VirtualenvwrapperCLI._exec_with_virtualenvwrapper_api(*commands)
+        try:
+            session = _BashSession.shared(init=VirtualenvwrapperCLI._SOURCE_CMD)
+        except OSError:
+            return VirtualenvwrapperCLI._exec_with_virtualenvwrapper_api(*commands)
+        return session.run(" ; ".join(commands))
 
     def _exec_with_virtualenvwrapper_api(*commands:str, 
                                          executable:StrOrBytesPath='/bin/bash', 
@@ -144,19 +164,21 @@ class VirtualenvwrapperCLI:
                                          ) -> CompletedProcess[bytes]:
         commands = [VirtualenvwrapperCLI._SOURCE_CMD] + list(commands)
         CMD = " ; ".join(commands)
-        return subprocess.run(CMD, shell=True, executable=executable, check=check)
+        return subprocess.run([executable, *_BASH_STARTUP_OPTS, '-c', CMD], check=check)
     
     def _is_requirements_file(file:FileDescriptorOrPath):
         return os.path.exists(file) and os.path.basename(file)=='requirements.txt'
 
     class _OptionsHandler:
         def _option_string(options:dict):
-            join = lambda strlist,delim=" ": delim.join(strlist)
-            options_list = [
-                f" {flag} {args}" if isinstance(args, str) else join([f" {flag} {arg}" for arg in args])
-                for flag, *args in options.items()
-            ]
-            return join(options_list)
+            # a list or tuple repeats the flag per element; anything else (str, path) is a single argument
+            parts = []
+            for flag, val in options.items():
+                if isinstance(val, (list, tuple)):
+                    parts.extend(f" {flag} {v}" for v in val)
+                else:
+                    parts.append(f" {flag} {val}")
+            return "".join(parts)
         
         @classmethod
         def mkvirtualenv_options(cls, 
@@ -178,6 +200,84 @@ class VirtualenvwrapperCLI:
             
 
 
+
+class _BashSession:
+    '''Long-lived bash process that runs commands one at a time.
+
+    Sourcing virtualenvwrapper re-executes hundreds of lines of shell, so the session
+    runs the init command once in the session shell itself. Every later command runs in
+    a subshell, which inherits the sourced functions but cannot leak cwd, variables or an
+    activated virtualenv into the commands after it. Each command is followed by an echo
+    of a per-session sentinel and its exit status, and its output is forwarded to stdout
+    until the sentinel is read back.
+    '''
+    _shared : Optional["_BashSession"] = None
+
+    def __init__(self, init:Optional[str]=None, executable:StrOrBytesPath='/bin/bash'):
+        self._sentinel = f"__DOWNWARDLAB_DONE_{uuid.uuid4().hex}__".encode()
+        # bytes, not text: child output is passed through undecoded, as a one-shot shell would
+        self._proc = subprocess.Popen([executable, *_BASH_STARTUP_OPTS], stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+        if init is not None:
+            self._run(f'eval {shlex.quote(init)}\n', init, check=False)
+
+    @classmethod
+    def shared(cls, init:Optional[str]=None) -> "_BashSession":
+        '''Return the process-wide session, starting a new one if there is none or it has exited.'''
+        if cls._shared is None or not cls._shared.alive:
+            cls._shared = cls(init=init)
+            atexit.register(cls._shared.close)
+        return cls._shared
+
+    @property
+    def alive(self) -> bool:
+        return self._proc.poll() is None
+
+    def run(self, command:str, check:bool=True) -> CompletedProcess[bytes]:
+        # commands must not read the session's own stdin, which carries the commands that follow.
+        # Passing the command to eval as one quoted word keeps a syntax error (e.g. an
+        # unbalanced quote) inside eval, so the sentinel echo is still read and run.
+        return self._run(f'( eval {shlex.quote(command)} ) </dev/null\n', command, check=check)
+
+    def _run(self, script:str, command:str, check:bool) -> CompletedProcess[bytes]:
+        try:
+            returncode = self._communicate(script)
+        except BaseException:
+            # output may be left unread; never hand a desynced session to the next command
+            self._discard()
+            raise
+        if check and returncode != 0:
+            raise subprocess.CalledProcessError(returncode, command)
+        return CompletedProcess(command, returncode)
+
+    def _communicate(self, script:str) -> int:
+        self._proc.stdin.write(script.encode() + b'echo "' + self._sentinel + b'$?"\n')
+        self._proc.stdin.flush()
+        sys.stdout.flush()
+        out = sys.stdout.buffer
+        returncode = None
+        for line in self._proc.stdout:
+            head, found, status = line.partition(self._sentinel)
+            out.write(head)
+            if found:
+                returncode = int(status)
+                break
+        out.flush()
+        if returncode is None: # bash exited before reporting back
+            returncode = self._proc.wait()
+        return returncode
+
+    def _discard(self) -> None:
+        self._proc.kill()
+        self._proc.wait()
+        if _BashSession._shared is self:
+            _BashSession._shared = None
+
+    def close(self) -> None:
+        if self.alive:
+            self._proc.stdin.close()
+            self._proc.wait()
+
+
 ########################################################################################################################
 def main():
     '''Testing
@@ -1,21 +1,66 @@
-from typing import Any, Collection, Optional, TypeAlias
-from dataclasses import dataclass
-from prompt_toolkit.shortcuts import prompt
-from prompt_toolkit import print_formatted_text
-from prompt_toolkit.formatted_text import FormattedText
+import sys, operator
+import functools as ft
+from typing import TYPE_CHECKING, Any, Callable, Collection, Optional, TypeAlias
+from dataclasses import dataclass, field
+
+# prompt_toolkit is slow to import, so it is only loaded where text is actually rendered
+if TYPE_CHECKING:
+    from prompt_toolkit.formatted_text import FormattedText
 
 # Type Aliases
 Style : TypeAlias = type[dict] | type["PyPromptTextAttrs"]
-Text  : TypeAlias = type[str]  | type["PyPromptFormattedText"] | type[FormattedText]
+Text  : TypeAlias = type[str]  | type["PyPromptFormattedText"] | type["FormattedText"]
 
 ########################################################################################################################
 
 '''Toggle whether code under 'if __name__=="__main__":' should execute when run as script.'''
 RUNNABLE = False
 
+'''Whether stdin is an interactive terminal; prompt_toolkit's terminal setup is skipped when it is not.'''
+_IS_TTY = sys.stdin is not None and sys.stdin.isatty()
+
 ########################################################################################################################
 
-@dataclass
+def _style_token(val:Any) -> str:
+    return str(val).strip()
+
+def _bgcolor_style(val:Any) -> str:
+    return f"bg:{_style_token(val)}"
+
+def _toggle_style(attr:str) -> Callable[[Optional[bool]],str]:
+    on, off = attr, f"no{attr}"
+    def fmt(val:Optional[bool]) -> str:
+        return off if val is False else on
+    return fmt
+
+'''(attribute, formatter) pairs in style string order, built once rather than per render.'''
+_STYLE_FORMATTERS : tuple[tuple[str, Callable[[Any],str]], ...] = (
+      ('color'     , _style_token)
+    , ('bgcolor'   , _bgcolor_style)
+    , ('bold'      , _toggle_style('bold'))
+    , ('italic'    , _toggle_style('italic'))
+    , ('underline' , _toggle_style('underline'))
+    , ('strike'    , _toggle_style('strike'))
+    , ('blink'     , _toggle_style('blink'))
+    , ('reverse'   , _toggle_style('reverse'))
+    , ('hidden'    , _toggle_style('hidden'))
+)
+_STYLE_ATTRS : tuple[str, ...] = tuple(attr for attr,_ in _STYLE_FORMATTERS)
+
+@ft.lru_cache(maxsize=256)
+def _compute_style_str(*values:Any) -> str:
+    '''Render attribute values given in _STYLE_ATTRS order; shared by all instances with the same style.'''
+    return " ".join([fmt(val) for (_,fmt),val in zip(_STYLE_FORMATTERS, values) if val is not None])
+
+def _style_prop(attr:str) -> property:
+    '''Property forwarding a style attribute to the owner's 'style' (PyPromptTextAttrs).'''
+    def fset(self, val:Any) -> None:
+        setattr(self.style, attr, val)
+    return property(operator.attrgetter(f'style.{attr}'), fset)
+
+########################################################################################################################
+
+@dataclass(slots=True)
 class PyPromptTextAttrs:
     color     : Optional[str]  = None
     bgcolor   : Optional[str]  = None
@@ -26,42 +71,40 @@ class PyPromptTextAttrs:
     blink     : Optional[bool] = None
     reverse   : Optional[bool] = None
     hidden    : Optional[bool] = None
+    # rendered style string; reset whenever a style attribute is assigned
+    _cached_str : Optional[str] = field(default=None, init=False, repr=False, compare=False)
+
+    def __setattr__(self, name:str, value:Any) -> None:
+        # object.__setattr__ rather than super(): slots=True rebuilds the class, breaking zero-arg super()
+        object.__setattr__(self, name, value)
+        if name in _STYLE_ATTRS:
+            object.__setattr__(self, '_cached_str', None)
     
     def to_dict(self) -> dict :
-        return self.__dict__
+        return {attr: getattr(self, attr) for attr in _STYLE_ATTRS}
     
     @staticmethod
     def from_dict(d:dict) -> "PyPromptTextAttrs" :
         return PyPromptTextAttrs(**d)
 
     def to_style_str(self) -> str:
-        tokenize    = lambda s: str(s).strip() if not None else ''
-        add_prefix  = lambda prfx: lambda val: f"{tokenize(prfx)}{tokenize(val)}"
-        toggle_attr = lambda attr: lambda val: f"{'no' if val is False else ''}{tokenize(attr)}"
-        attr_formatter = {
-              'color'     : tokenize
-            , 'bgcolor'   : add_prefix('bg:')
-            , 'bold'      : toggle_attr('bold')
-            , 'italic'    : toggle_attr('italic')
-            , 'underline' : toggle_attr('underline')
-            , 'strike'    : toggle_attr('strike')
-            , 'blink'     : toggle_attr('blink')
-            , 'reverse'   : toggle_attr('reverse')
-            , 'hidden'    : toggle_attr('hidden')
-        }
-        return " ".join([attr_formatter[k](v) for k,v in self.to_dict().items() if v is not None ])
+        if self._cached_str is None:
+            self._cached_str = _compute_style_str(*[getattr(self, attr) for attr in _STYLE_ATTRS])
+        return self._cached_str
     
     def __str__(self) -> str:
         classname = type(self).__name__
-        attrlist = ', '.join([f'{attr}={val}' for attr,val in self.to_dict().items() if val is not None])
+        attrlist = ', '.join([f'{attr}={val}' for attr in _STYLE_ATTRS if (val := getattr(self, attr)) is not None])
         return f'{classname}({attrlist})'
     
 
 
 class PyPromptFormattedText():
+    __slots__ = ('text', 'style', '_cached_ft')
     
     def __init__(self, text:str, style:Optional[Style]=None, **style_kwargs:dict[str,Any]) -> None:
         self.text = text
+        self._cached_ft = None
         # Raise error if style is overdefined
         if style is not None and not style_kwargs=={}:
             raise ValueError("too many arguments specified (expected at most one of 'style' and 'style_kwargs')")
@@ -75,35 +118,30 @@ class PyPromptFormattedText():
         else:
             raise TypeError("Inappropriate argument type for parameter 'style' (expected one of 'None', 'dict', or 'PyPromptTextAttrs')")
 
-    class style_property(property):
-        @staticmethod
-        def __fget_textattr(attr:str) -> Any:
-            return lambda self: getattr(self.style, attr)
-        @staticmethod
-        def __fset_textattr(attr:str) -> None:
-            return lambda self,val: setattr(self.style, attr, val)
-        def __init__(self,attr:str) -> None:
-            super().__init__(self.__fget_textattr(attr), self.__fset_textattr(attr))
-
     text: str
-    style: PyPromptTextAttrs = None
-    color     : Optional[str] = style_property("color")
-    bgcolor   : Optional[str] = style_property("bgcolor")
-    bold      : Optional[bool] = style_property("bold")
-    italic    : Optional[bool] = style_property("italic")
-    underline : Optional[bool] = style_property("underline")
-    strike    : Optional[bool] = style_property("strike")
-    blink     : Optional[bool] = style_property("blink")
-    reverse   : Optional[bool] = style_property("reverse")
-    hidden    : Optional[bool] = style_property("hidden")
+    style: PyPromptTextAttrs
+    color     : Optional[str] = _style_prop("color")
+    bgcolor   : Optional[str] = _style_prop("bgcolor")
+    bold      : Optional[bool] = _style_prop("bold")
+    italic    : Optional[bool] = _style_prop("italic")
+    underline : Optional[bool] = _style_prop("underline")
+    strike    : Optional[bool] = _style_prop("strike")
+    blink     : Optional[bool] = _style_prop("blink")
+    reverse   : Optional[bool] = _style_prop("reverse")
+    hidden    : Optional[bool] = _style_prop("hidden")
     style_str : str = property(fget=lambda self: self.style.to_style_str() if self.style is not None else '')
 
     
     def to_dict(self) -> dict[str, Any]:
-        return self.__dict__
-
-    def to_formatted_text(self) -> FormattedText:
-        return FormattedText([(self.style_str, self.text)])
+        return {"text": self.text, "style": self.style.to_dict() if self.style is not None else None}
+
+    def to_formatted_text(self) -> "FormattedText":
+        # reuse the last result while its (style, text) fragment is still current
+        fragment = (self.style_str, self.text)
+        if self._cached_ft is None or self._cached_ft[0] != fragment:
+            from prompt_toolkit.formatted_text import FormattedText
+            self._cached_ft = FormattedText([fragment])
+        return self._cached_ft
     
     def __str__(self) -> str:
         return str(self.text)
@@ -115,12 +153,22 @@ class PyPromptFormattedText():
     
 
 class Prompt(PyPromptFormattedText):
+    __slots__ = ()
+
     def __init__(self, text:str, style:Optional[Style]=None, **style_kwargs:dict[str,Any]):
-        text = text if text.endswith(' ') else text+' '
+        '''Prompt text should end with a space to separate it from the user's input.
+
+        Text without one gets a space appended here, once per instance; callers that
+        already pass a trailing space skip the concatenation.
+        '''
+        if not text.endswith(' '):
+            text += ' '
         super().__init__(text, style, **style_kwargs)
     
     def __call__(self, format=True) -> str:
-        if format: return prompt(self.to_formatted_text())
+        if format and _IS_TTY:
+            from prompt_toolkit.shortcuts import prompt
+            return prompt(self.to_formatted_text())
         else:      return input(self.text)
 
     
@@ -128,26 +176,44 @@ class Prompt(PyPromptFormattedText):
 
 class ConfirmationPrompt():
 
-    @dataclass
     class _ResponseHandling:
-        affirmative:Collection[str]
-        negative:Collection[str]
-        case_sensitive:bool
+        __slots__ = ('affirmative', 'negative', 'case_sensitive', '_affirmative', '_negative', '_valid')
+
+        def __init__(self, affirmative:Collection[str], negative:Collection[str], case_sensitive:bool) -> None:
+            self.affirmative = affirmative
+            self.negative = negative
+            self.case_sensitive = case_sensitive
+            # normalize once so each check is a single frozenset lookup
+            normalize = self._normalize
+            self._affirmative = frozenset(normalize(a) for a in affirmative)
+            self._negative = frozenset(normalize(n) for n in negative)
+            self._valid = self._affirmative | self._negative
+
+        def __repr__(self) -> str:
+            clsname = type(self).__name__
+            return f'{clsname}(affirmative={self.affirmative!r}, negative={self.negative!r}, case_sensitive={self.case_sensitive!r})'
 
         @property
         def valid(self) -> Collection[str]:
-            return set([*self.affirmative, *self.negative])
+            return self._valid
 
-        def check_element(self, elem:str, collection:Collection[str]):
-            e = elem.lower() if self.case_sensitive is False else elem
-            C = [c.lower() for c in collection] if self.case_sensitive is False else collection
-            return e in C
+        def _normalize(self, response:str) -> str:
+            return response if self.case_sensitive else response.casefold()
         def is_valid(self, response:str) -> bool:
-            return self.check_element(response, self.valid)
+            return self._normalize(response) in self._valid
         def is_affirmative(self, response:str) -> bool:
-            return self.check_element(response, self.affirmative)
+            return self._normalize(response) in self._affirmative
         def is_negative(self, response:str) -> bool:
-            return self.check_element(response, self.negative)
+            return self._normalize(response) in self._negative
+        def classify(self, response:str) -> Optional[bool]:
+            '''True if affirmative, False if negative, None if invalid; normalizes the response only once.'''
+            r = self._normalize(response)
+            if r in self._affirmative: return True
+            if r in self._negative:    return False
+            return None
+
+    # shared handler for the default y/yes, n/no responses; it is never mutated after construction
+    _DEFAULT_RESPONSES = _ResponseHandling(affirmative=("y","yes"), negative=("n","no"), case_sensitive=False)
 
 
     def __init__(self,  prompt:str, *,
@@ -165,7 +231,10 @@ class ConfirmationPrompt():
         
         self.prompt = Prompt(text=prompt, style=style, **style_kwargs)
         self.max_attempts = max_attempts
-        self._responses = self._ResponseHandling(affirmative=affirmative, negative=negative, case_sensitive=case_sensitive)
+        if (tuple(affirmative), tuple(negative), case_sensitive) == (("y","yes"), ("n","no"), False):
+            self._responses = self._DEFAULT_RESPONSES
+        else:
+            self._responses = self._ResponseHandling(affirmative=affirmative, negative=negative, case_sensitive=case_sensitive)
         self._exceptions = {
             "InvalidInput" : PyPromptFormattedText(text=invalid_response_warning, style=warning_style),
             "MaxAttempts"  : PyPromptFormattedText(text=max_attempts_err, style=error_style)
@@ -176,21 +245,21 @@ class ConfirmationPrompt():
     def __call__(self) -> Optional[bool]:
         attempt = 1
         while True:
-            response = self.prompt()
-            if self._responses.is_valid(response):
+            result = self._responses.classify(self.prompt())
+            if result is not None:
                 # Valid input; return True if affirmative, or False if negative
-                return self._responses.is_affirmative(response)
+                return result
             
             # Invalid input; repeat prompt
+            from prompt_toolkit import print_formatted_text
             print_formatted_text(self._exceptions["InvalidInput"].to_formatted_text())
             attempt+=1
 
-            try: # Assert that maximum number of attempts has not been exceeded
-                assert self.max_attempts is None or attempt <= self.max_attempts, "exceeded input attempt limit"
-            except AssertionError as e:
+            if self.max_attempts is not None and attempt > self.max_attempts:
                 # Too many failed attempts; print error message and throw AssertionError
+                # (raised explicitly so the limit still holds under `python -O`)
                 print_formatted_text(self._exceptions["MaxAttempts"].to_formatted_text())
-                raise e
+                raise AssertionError("exceeded input attempt limit")
         
 
     def __str__(self) -> bool:
@@ -216,24 +285,61 @@ def confirmation_prompt(prompt:str, *,
                         **style_kwargs
                         ) -> str:
     '''Create an anonymous confirmation prompt and call it immediately, returning the result.
+
+    Prompts are cached by their arguments, so repeated confirmations with the same
+    arguments reuse one ConfirmationPrompt instead of rebuilding it each time.
     '''
+    key = ( prompt,
+            _freeze_style(style),
+            max_attempts,
+            invalid_response_warning,
+            max_attempts_err,
+            _freeze_style(warning_style),
+            _freeze_style(error_style),
+            tuple(affirmative),
+            tuple(negative),
+            case_sensitive,
+            _freeze_style(style_kwargs)  )
+    try:
+        hash(key)
+        build = _cached_confirmation_prompt
+    except TypeError: # unhashable message text (e.g. FormattedText); build it uncached
+        build = _cached_confirmation_prompt.__wrapped__
+    confirm = build(*key)
+    return confirm.__call__()
+
+def _freeze_style(style:Optional[Style]) -> Optional[tuple]:
+    '''Hashable form of a style argument, used as part of the confirmation_prompt cache key.'''
+    if isinstance(style, PyPromptTextAttrs):
+        style = style.to_dict()
+    if not isinstance(style, dict):
+        return style # None, or an invalid style left for the constructor to reject
+    return tuple(sorted(style.items()))
+
+@ft.lru_cache(maxsize=32)
+def _cached_confirmation_prompt(prompt, style, max_attempts, invalid_response_warning, max_attempts_err,
+                                warning_style, error_style, affirmative, negative, case_sensitive, style_kwargs
+                                ) -> ConfirmationPrompt:
+    thaw = lambda frozen: dict(frozen) if isinstance(frozen, tuple) else frozen
     return ConfirmationPrompt(prompt=prompt,
-                                style=style,
+                                style=thaw(style),
                                 max_attempts=max_attempts,
                                 invalid_response_warning=invalid_response_warning,
                                 max_attempts_err=max_attempts_err,
-                                warning_style=warning_style,
-                                error_style=error_style,
+                                warning_style=thaw(warning_style),
+                                error_style=thaw(error_style),
                                 affirmative=affirmative,
                                 negative=negative,
                                 case_sensitive=case_sensitive,
-                                **style_kwargs
-    ).__call__()
+                                **thaw(style_kwargs)
+    )
 
 
 ################################################## TEST SCRIPT #########################################################
 
 def test():
+    from prompt_toolkit import print_formatted_text
+    from prompt_toolkit.formatted_text import FormattedText
     expdir = "{expdir}"
     experiment_name = "{experiment_name}"
     OVERWRITE_WARNING = FormattedText([
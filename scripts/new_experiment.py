@@ -1,11 +1,10 @@
 #! /usr/bin/python3
 
 import os, sys
-import functools as ft
 from shutil import rmtree
 
 from scripts.lib.helpers import downwardlab_home, VirtualenvwrapperCLI, chmod_plus_x, add_abort_condition
-from scripts.lib.prompt_utils import confirmation_prompt, PyPromptTextAttrs, FormattedText
+from scripts.lib.prompt_utils import confirmation_prompt
 ########################################################################################################
 
 def main(experiment_name):
@@ -65,18 +64,20 @@ def confirm_overwrite(experiment_name, expdir):
             negative=('no',)
         )
 
-def generate_overwrite_warning(experiment_name, expdir):
-    warningtxt   = PyPromptTextAttrs(color='#ffff00')
-    warninglabel = PyPromptTextAttrs(color='#ff0000', bold=True)
-    emphasized   = PyPromptTextAttrs(color='#ff0000', bold=True, underline=True)
+# overwrite warning styles, written out as prompt_toolkit style strings since they never change
+_WARNING_TXT_STYLE   = "#ffff00"
+_WARNING_LABEL_STYLE = "#ff0000 bold"
+_EMPHASIZED_STYLE    = "#ff0000 bold underline"
 
+def generate_overwrite_warning(experiment_name, expdir):
+    from prompt_toolkit.formatted_text import FormattedText
     overwrite_warning = FormattedText([
-        (warninglabel.to_style_str(), "[WARNING] "),
-        (warningtxt.to_style_str(), f"Experiment directory {expdir}/ already exists. Creating a new experiment of this name will "),
-        (emphasized.to_style_str(), f"permanently delete"),
-        (warningtxt.to_style_str(), f" all existing data in {expdir}/ and "),
-        (emphasized.to_style_str(), f"completely reset"),
-        (warningtxt.to_style_str(), f" the '{experiment_name}' virtualenv.\n"),
+        (_WARNING_LABEL_STYLE, "[WARNING] "),
+        (_WARNING_TXT_STYLE, f"Experiment directory {expdir}/ already exists. Creating a new experiment of this name will "),
+        (_EMPHASIZED_STYLE, f"permanently delete"),
+        (_WARNING_TXT_STYLE, f" all existing data in {expdir}/ and "),
+        (_EMPHASIZED_STYLE, f"completely reset"),
+        (_WARNING_TXT_STYLE, f" the '{experiment_name}' virtualenv.\n"),
     ])
     return overwrite_warning
 
@@ -96,7 +97,7 @@ def create_exp_venv(experiment_name, DL_HOME):
 
 def generate_virtualenvwrapper_hooks(experiment_name, DL_HOME):
     ## DownwardLab virtualenvwrapper hooks
-    hookdir = ft.reduce(os.path.join, [os.getenv('WORKON_HOME'),experiment_name, 'bin'])
+    hookdir = os.path.join(os.getenv('WORKON_HOME'), experiment_name, 'bin')
     hooks = ["preactivate", "postactivate", "predeactivate", "postdeactivate"]
     # Some of the hook files have to be made executable to be run instead of sourced
     EXECUTABLE = ["preactivate"]
@@ -109,78 +110,74 @@ def generate_virtualenvwrapper_hooks(experiment_name, DL_HOME):
 
 def write_hook(hookdir, hook, *args, overwrite=False, exec='/bin/bash', executable=False):
     hookfile = os.path.join(hookdir, hook)
-    permission = 'w' if overwrite else 'a'
+    payload = _generate_hook_text(hook, *args)
+    if executable: # Add shebang
+        payload = f'#!{exec}\n\n{payload}'
+    permission = 'wb' if overwrite else 'ab'
     with open(hookfile, permission) as f:
-        if executable: # Add shebang
-            f.write(f'#!{exec}\n\n')
-        f.write(_generate_hook_text(hook, *args))
+        f.write(payload.encode())
     if executable: 
         chmod_plus_x(hookfile)
 
+# hook name -> text generator taking the hook args; only postactivate uses them
+_HOOK_TEXT_FNS = {
+    'preactivate'    : lambda args: preactivate_text(),
+    'postactivate'   : lambda args: postactivate_text(*args),
+    'predeactivate'  : lambda args: predeactivate_text(),
+    'postdeactivate' : lambda args: postdeactivate_text()
+}
+
 def _generate_hook_text(hook, *hook_args):
-    funcs = {
-        'preactivate'    : preactivate_text,
-        'postactivate'   : postactivate_text,
-        'predeactivate'  : predeactivate_text,
-        'postdeactivate' : postdeactivate_text
-    }
-    args = {
-        'preactivate'    : None,
-        'postactivate'   : 1,
-        'predeactivate'  : None,
-        'postdeactivate' : None
-    }
-    if args[hook] is not None:
-        return funcs[hook](*hook_args)
-    else:
-        return funcs[hook]()
+    return _HOOK_TEXT_FNS[hook](hook_args)
 
 
 ################## Hook File Data ##################
 
-def preactivate_text():
-    commands = [
-        'export _BASEENV_PYTHONPATH="${PYTHONPATH}"',
-        'unset PYTHONPATH',
-    ]
-    string =  '\n'.join(commands)
-    return string
+# Hook texts are static apart from the DownwardLab root dir, so they are assembled once at import.
+
+_PREACTIVATE_TEXT = '\n'.join([
+    'export _BASEENV_PYTHONPATH="${PYTHONPATH}"',
+    'unset PYTHONPATH',
+])
+
+# filled in with str.format, so literal shell braces are doubled
+_POSTACTIVATE_TEMPLATE = '\n'.join([
+    'export _BASEENV_PROJECT_HOME=${{PROJECT_HOME}}',
+    'export PROJECT_HOME={dlab_rootdir}',
+    '\n',
+    'export _BASEENV_PATH=${{PATH}}',
+    'export PATH=${{PROJECT_HOME}}/VAL:${{PATH}}',
+    '\n',
+    'export DOWNWARD_BENCHMARKS=${{PROJECT_HOME}}/benchmarks',
+    'export DOWNWARD_REPO=${{PROJECT_HOME}}/fast-downward',
+])
+
+_PREDEACTIVATE_TEXT = '\nexport PROJECT_HOME=${_BASEENV_PROJECT_HOME}'  \
+                      '\nunset _BASEENV_PROJECT_HOME'         \
+                      '\n' \
+                      '\nexport PATH=$_BASEENV_PATH'   \
+                      '\nunset _BASEENV_PATH' \
+                      '\n' \
+                      '\nunset DOWNWARD_BENCHMARKS' \
+                      '\nunset DOWNWARD_REPO' \
+                      '\n'
+
+_POSTDEACTIVATE_TEXT = '\n'.join([
+    'export PYTHONPATH="${_BASEENV_PYTHONPATH}"',
+    'unset _BASEENV_PYTHONPATH'
+])
 
+def preactivate_text():
+    return _PREACTIVATE_TEXT
 
 def postactivate_text(dlab_rootdir):
-    commands = [
-        'export _BASEENV_PROJECT_HOME=${PROJECT_HOME}',
-        f'export PROJECT_HOME={dlab_rootdir}',  
-        '\n',
-        'export _BASEENV_PATH=${PATH}',
-        'export PATH=${PROJECT_HOME}/VAL:${PATH}',
-        '\n',
-        'export DOWNWARD_BENCHMARKS=${PROJECT_HOME}/benchmarks' \
-        'export DOWNWARD_REPO=${PROJECT_HOME}/fast-downward' \
-    ]
-    
-    string =  '\n'.join(commands)
-    return string
+    return _POSTACTIVATE_TEMPLATE.format(dlab_rootdir=dlab_rootdir)
 
 def predeactivate_text():
-    string = '\nexport PROJECT_HOME=${_BASEENV_PROJECT_HOME}'  \
-             '\nunset _BASEENV_PROJECT_HOME'         \
-             '\n' \
-             '\nexport PATH=$_BASEENV_PATH'   \
-             '\nunset _BASEENV_PATH' \
-             '\n' \
-             '\nunset DOWNWARD_BENCHMARKS' \
-             '\nunset DOWNWARD_REPO' \
-             '\n'
-    return string
+    return _PREDEACTIVATE_TEXT
 
 def postdeactivate_text():
-    commands = [
-        'export PYTHONPATH="${_BASEENV_PYTHONPATH}"',
-        'unset _BASEENV_PYTHONPATH'
-    ]
-    string =  '\n'.join(commands)
-    return string
+    return _POSTDEACTIVATE_TEXT
 
 
 